@@ -7,12 +7,29 @@ based on current game state analysis.
 """
 
 import json
+import re
 import boto3
 import base64
 import time
 import os
 from typing import Dict, Any, Optional
 from .game_state import GameStateMonitor
+from . import player_movement, player_attacks
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; _dumps falls back to json.dumps
+    orjson = None
+
+# A flat JSON object carrying an "action" key, as requested by every prompt
+_ACTION_JSON = re.compile(r'\{[^{}]*"action"[^{}]*\}')
+
+
+def _dumps(obj) -> str:
+    """Serialize to compact JSON text, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False)
 
 
 class NovaGameplayAI:
@@ -27,6 +44,27 @@ class NovaGameplayAI:
         self.model_id = os.getenv('NOVA_MODEL_ID', 'amazon.nova-micro-v1:0')
         self.game_monitor = GameStateMonitor()
         
+        # Controllers only hold key mappings, so build them once
+        self._movement = player_movement.MovementController()
+        self._attacks = player_attacks.AttackController(monitor=self.game_monitor)
+        
+        # Action name -> handler, built once for constant-time dispatch
+        self._actions = {
+            'attack': lambda: self._attacks.execute_attack_chain('basic_combo'),
+            'power_combo': lambda: self._attacks.execute_attack_chain('power_combo'),
+            'aoe_combo': lambda: self._attacks.execute_attack_chain('aoe_combo'),
+            'retreat': lambda: self._movement.move_backward(2.0),
+            'rest': lambda: time.sleep(3.0),  # Rest for 3 seconds
+            'move_forward': lambda: self._movement.move_forward(1.5),
+            'circle_strafe': lambda: self._movement.circle_strafe_target(radius=8, duration=2.0),
+            'turn_left': lambda: self._movement.turn_left(45),
+            'turn_right': lambda: self._movement.turn_right(45),
+            'patrol': lambda: self._movement.patrol_area(),
+            'search_enemies': lambda: self._attacks.target_nearest_enemy(),
+            'find_cover': lambda: self._movement.move_backward(3.0),
+            'wait': lambda: time.sleep(2.0)
+        }
+        
         # Decision prompts for different game scenarios
         self.decision_prompts = {
             "combat": """
@@ -76,6 +114,21 @@ class NovaGameplayAI:
             Respond with ONLY a JSON object: {{"action": "action_name", "reason": "brief explanation"}}
             """
         }
+        
+        # Split each prompt around its game state slot once, so a decision
+        # only has to join the serialized stats in between
+        self._prompt_parts = {
+            scenario: template.format(game_state='\0').split('\0')
+            for scenario, template in self.decision_prompts.items()
+        }
+        
+        # Inference settings are the same for every request
+        self._inference_config = {
+            "max_new_tokens": 256,
+            "temperature": 0.3,
+            "top_p": 0.9,
+            "top_k": 50
+        }
     
     def call_nova_with_image(self, prompt: str, image_data: Optional[str] = None) -> Dict[str, Any]:
         """Call Nova with text prompt and optional screenshot."""
@@ -87,7 +140,7 @@ class NovaGameplayAI:
             if image_data:
                 content.append({
                     "image": {
-                        "format": "png",
+                        "format": "jpeg",
                         "source": {"bytes": image_data}
                     }
                 })
@@ -96,24 +149,44 @@ class NovaGameplayAI:
                 "messages": [
                     {"role": "user", "content": content}
                 ],
-                "inferenceConfig": {
-                    "max_new_tokens": 256,
-                    "temperature": 0.3,
-                    "top_p": 0.9,
-                    "top_k": 50
-                }
+                "inferenceConfig": self._inference_config
             }
             
-            response = self.bedrock_client.invoke_model(
+            response = self.bedrock_client.invoke_model_with_response_stream(
                 modelId=self.model_id,
                 contentType='application/json',
                 accept='application/json',
-                body=json.dumps(body)
+                body=_dumps(body)
             )
             
-            response_text = json.loads(response['body'].read())["output"]["message"]["content"][0]["text"]
+            # The action object arrives in the first few tokens, so stop
+            # reading as soon as it is complete instead of waiting for the rest
+            stream = response['body']
+            response_text = ''
+            scan_from = 0  # Start of text not yet ruled out as the action
+            try:
+                for event in stream:
+                    chunk = event.get('chunk')
+                    if not chunk:
+                        continue
+                    delta = json.loads(chunk['bytes']).get('contentBlockDelta')
+                    if not delta:
+                        continue
+                    
+                    text = delta['delta'].get('text', '')
+                    response_text += text
+                    if '}' in text:
+                        match = _ACTION_JSON.search(response_text, scan_from)
+                        if match:
+                            try:
+                                return json.loads(match.group())
+                            except json.JSONDecodeError:
+                                # Keep reading past it; a later object may parse
+                                scan_from = match.end()
+            finally:
+                stream.close()
             
-            # Try to parse as JSON
+            # Try to parse the full response as JSON
             try:
                 return json.loads(response_text)
             except json.JSONDecodeError:
@@ -144,23 +217,35 @@ class NovaGameplayAI:
             # Take screenshot and convert to base64
             screenshot = self.game_monitor.take_screenshot()
             import cv2
-            _, buffer = cv2.imencode('.png', screenshot)
+            
+            # Nova downsamples large images anyway, so send a smaller JPEG;
+            # it encodes far faster than PNG and uploads a fraction of the bytes
+            height, width = screenshot.shape[:2]
+            if width > 1024:
+                size = (1024, round(height * 1024 / width))
+                screenshot = cv2.resize(screenshot, size, interpolation=cv2.INTER_AREA)
+            _, buffer = cv2.imencode('.jpg', screenshot, [int(cv2.IMWRITE_JPEG_QUALITY), 75])
             return base64.b64encode(buffer).decode('utf-8')
         except Exception as e:
             print(f"Screenshot error: {e}")
             return None
     
-    def make_gameplay_decision(self) -> Dict[str, Any]:
-        """Make an AI-driven gameplay decision based on current state."""
+    def make_gameplay_decision(self, stats: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Make an AI-driven gameplay decision based on current state.
+        
+        Pass stats already read this tick (including in_combat and
+        enemy_targeted) to decide on exactly the state the caller has seen.
+        """
         # Get current game state
-        stats = self.game_monitor.get_player_stats()
-        stats['in_combat'] = self.game_monitor.detect_combat_state()
-        stats['enemy_targeted'] = self.game_monitor.detect_enemy_target()
+        if stats is None:
+            stats = self.game_monitor.get_player_stats()
+            stats['in_combat'] = self.game_monitor.detect_combat_state(stats)
+            stats['enemy_targeted'] = self.game_monitor.detect_enemy_target()
         
         # Determine scenario and get appropriate prompt
         scenario = self.analyze_game_state(stats)
-        prompt_template = self.decision_prompts[scenario]
-        prompt = prompt_template.format(game_state=json.dumps(stats, indent=2))
+        prefix, suffix = self._prompt_parts[scenario]
+        prompt = prefix + _dumps(stats) + suffix
         
         # Get screenshot for visual context
         screenshot_data = self.get_screenshot_data()
@@ -178,44 +263,14 @@ class NovaGameplayAI:
     def execute_decision(self, decision: Dict[str, Any]) -> bool:
         """Execute the AI's decision using game controllers."""
         action = decision.get('action', 'rest')
+        handler = self._actions.get(action)
+        
+        if handler is None:
+            print(f"Unknown action: {action}")
+            return False
         
         try:
-            from . import player_movement, player_attacks
-            
-            movement = player_movement.MovementController()
-            attacks = player_attacks.AttackController()
-            
-            # Execute based on action type
-            if action == 'attack':
-                attacks.execute_attack_chain('basic_combo')
-            elif action == 'power_combo':
-                attacks.execute_attack_chain('power_combo')
-            elif action == 'aoe_combo':
-                attacks.execute_attack_chain('aoe_combo')
-            elif action == 'retreat':
-                movement.move_backward(2.0)
-            elif action == 'rest':
-                time.sleep(3.0)  # Rest for 3 seconds
-            elif action == 'move_forward':
-                movement.move_forward(1.5)
-            elif action == 'circle_strafe':
-                movement.circle_strafe_target(radius=8, duration=2.0)
-            elif action == 'turn_left':
-                movement.turn_left(45)
-            elif action == 'turn_right':
-                movement.turn_right(45)
-            elif action == 'patrol':
-                movement.patrol_area()
-            elif action == 'search_enemies':
-                attacks.target_nearest_enemy()
-            elif action == 'find_cover':
-                movement.move_backward(3.0)
-            elif action == 'wait':
-                time.sleep(2.0)
-            else:
-                print(f"Unknown action: {action}")
-                return False
-                
+            handler()
             return True
             
         except Exception as e:
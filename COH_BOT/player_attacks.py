@@ -14,11 +14,16 @@ from typing import Dict, List, Tuple, Optional
 class AttackController:
     """Controls player combat abilities using hotkey inputs."""
     
-    def __init__(self):
-        """Initialize the attack controller with default settings."""
+    def __init__(self, monitor=None):
+        """Initialize the attack controller with default settings.
+        
+        monitor is an optional GameStateMonitor used for health checks;
+        one is created on first use if not given.
+        """
         # Disable pyautogui failsafe for smoother operation
         pyautogui.FAILSAFE = True
-        pyautogui.PAUSE = 0.05
+        # No implicit pause after each key event; chain timings are explicit
+        pyautogui.PAUSE = 0
         
         # Default hotkey mappings (1-9 number keys)
         self.hotkeys = {
@@ -57,18 +62,32 @@ class AttackController:
             8: 3.0,  # Large AoE
             9: 1.0   # Utility/buff
         }
+        
+        self._monitor = monitor
+    
+    def _validate_chain(self, chain: List[Tuple[int, float]]):
+        """Raise ValueError if any step of a chain uses an unknown ability."""
+        for ability_key, _ in chain:
+            if ability_key not in self.hotkeys:
+                raise ValueError(f"Invalid ability number: {ability_key}")
+    
+    def _health_monitor(self):
+        """Return the game state monitor, creating it on first use."""
+        if self._monitor is None:
+            from .game_state import GameStateMonitor
+            self._monitor = GameStateMonitor()
+        return self._monitor
     
     def use_ability(self, ability_number: int, wait_for_animation: bool = True):
         """Use a single ability by hotkey number."""
         if ability_number not in self.hotkeys:
             raise ValueError(f"Invalid ability number: {ability_number}")
         
-        key = self.hotkeys[ability_number]
-        pyautogui.press(key)
+        # Read the public dicts directly so remapped keys take effect at once
+        pyautogui.press(self.hotkeys[ability_number])
         
         if wait_for_animation:
-            wait_time = self.ability_timings.get(ability_number, 1.5)
-            time.sleep(wait_time)
+            time.sleep(self.ability_timings.get(ability_number, 1.5))
     
     def execute_attack_chain(self, chain_name: str, interrupt_on_low_health: bool = False):
         """Execute a predefined attack chain."""
@@ -76,20 +95,22 @@ class AttackController:
             raise ValueError(f"Unknown attack chain: {chain_name}")
         
         chain = self.attack_chains[chain_name]
+        hotkeys = self.hotkeys
+        
+        # Check every step before pressing anything
+        self._validate_chain(chain)
         
         for ability_key, wait_time in chain:
             # Optional: Check health before continuing (requires game_state module)
             if interrupt_on_low_health:
                 try:
-                    from .game_state import GameStateMonitor
-                    monitor = GameStateMonitor()
-                    if monitor.get_health_percentage() < 20:
+                    if self._health_monitor().get_health_percentage() < 20:
                         print("Low health detected, interrupting attack chain")
                         break
                 except ImportError:
                     pass  # Continue if game_state module not available
             
-            self.use_ability(ability_key, wait_for_animation=False)
+            pyautogui.press(hotkeys[ability_key])
             time.sleep(wait_time)
     
     def custom_attack_sequence(self, sequence: List[Tuple[int, float]]):
@@ -129,6 +150,7 @@ class AttackController:
     
     def add_custom_chain(self, name: str, chain: List[Tuple[int, float]]):
         """Add a new custom attack chain."""
+        self._validate_chain(chain)
         self.attack_chains[name] = chain
     
     def modify_ability_timing(self, ability_number: int, new_timing: float):
@@ -179,9 +201,7 @@ class AttackController:
             
             # Optional break on low health
             try:
-                from .game_state import GameStateMonitor
-                monitor = GameStateMonitor()
-                if monitor.get_health_percentage() < 15:
+                if self._health_monitor().get_health_percentage() < 15:
                     print("Critical health, stopping continuous attacks")
                     break
             except ImportError:
@@ -11,6 +11,10 @@ import time
 import math
 
 
+# Slope of the 10 degree line; offsets steeper than this warrant a turn
+_TAN_10 = math.tan(math.radians(10))
+
+
 class MovementController:
     """Controls player character movement using keyboard inputs."""
     
@@ -18,7 +22,8 @@ class MovementController:
         """Initialize the movement controller with default settings."""
         # Disable pyautogui failsafe for smoother operation
         pyautogui.FAILSAFE = True
-        pyautogui.PAUSE = 0.1
+        # No implicit pause after each key event; hold durations are explicit
+        pyautogui.PAUSE = 0
         
         # Default key mappings for City of Heroes
         self.keys = {
@@ -33,44 +38,36 @@ class MovementController:
             'fly': 'f'
         }
     
+    def _hold(self, key, duration):
+        """Hold a key down for exactly the given duration."""
+        pyautogui.keyDown(key)
+        time.sleep(duration)
+        pyautogui.keyUp(key)
+    
     def move_forward(self, duration=1.0):
         """Move character forward for specified duration."""
-        pyautogui.keyDown(self.keys['forward'])
-        time.sleep(duration)
-        pyautogui.keyUp(self.keys['forward'])
+        self._hold(self.keys['forward'], duration)
     
     def move_backward(self, duration=1.0):
         """Move character backward for specified duration."""
-        pyautogui.keyDown(self.keys['backward'])
-        time.sleep(duration)
-        pyautogui.keyUp(self.keys['backward'])
+        self._hold(self.keys['backward'], duration)
     
     def strafe_left(self, duration=1.0):
         """Strafe left for specified duration."""
-        pyautogui.keyDown(self.keys['strafe_left'])
-        time.sleep(duration)
-        pyautogui.keyUp(self.keys['strafe_left'])
+        self._hold(self.keys['strafe_left'], duration)
     
     def strafe_right(self, duration=1.0):
         """Strafe right for specified duration."""
-        pyautogui.keyDown(self.keys['strafe_right'])
-        time.sleep(duration)
-        pyautogui.keyUp(self.keys['strafe_right'])
+        self._hold(self.keys['strafe_right'], duration)
     
     def turn_left(self, angle=45):
         """Turn character left by specified angle (approximate)."""
         # Rough calculation: 1 second of turning ≈ 180 degrees
-        duration = angle / 180.0
-        pyautogui.keyDown(self.keys['turn_left'])
-        time.sleep(duration)
-        pyautogui.keyUp(self.keys['turn_left'])
+        self._hold(self.keys['turn_left'], angle / 180.0)
     
     def turn_right(self, angle=45):
         """Turn character right by specified angle (approximate)."""
-        duration = angle / 180.0
-        pyautogui.keyDown(self.keys['turn_right'])
-        time.sleep(duration)
-        pyautogui.keyUp(self.keys['turn_right'])
+        self._hold(self.keys['turn_right'], angle / 180.0)
     
     def jump(self):
         """Make character jump."""
@@ -86,23 +83,24 @@ class MovementController:
     
     def circle_strafe_target(self, radius=10, duration=5.0, clockwise=True):
         """Circle strafe around a target."""
-        steps = int(duration * 10)  # 10 steps per second
-        step_duration = duration / steps
-        turn_angle = 360 / steps
+        strafe_key = self.keys['strafe_right' if clockwise else 'strafe_left']
+        turn = self.turn_right if clockwise else self.turn_left
         
-        for _ in range(steps):
-            # Move forward slightly
-            self.move_forward(step_duration * 0.3)
-            
-            # Strafe in circle
-            if clockwise:
-                self.strafe_right(step_duration * 0.4)
-                self.turn_right(turn_angle)
-            else:
-                self.strafe_left(step_duration * 0.4)
-                self.turn_left(turn_angle)
-            
-            time.sleep(step_duration * 0.3)
+        # Hold forward and strafe for the whole circle and turn in a few
+        # segments, rather than re-pressing every key ten times a second
+        segments = 4
+        segment_duration = duration / segments
+        turn_angle = 360 / segments
+        
+        pyautogui.keyDown(self.keys['forward'])
+        pyautogui.keyDown(strafe_key)
+        try:
+            for _ in range(segments):
+                turn(turn_angle)
+                time.sleep(max(0, segment_duration - turn_angle / 180.0))
+        finally:
+            pyautogui.keyUp(strafe_key)
+            pyautogui.keyUp(self.keys['forward'])
     
     def kite_enemy(self, distance=15):
         """Perform kiting maneuver - move away while maintaining distance."""
@@ -132,22 +130,24 @@ class MovementController:
         # Calculate direction to target
         dx = x - current_x
         dy = y - current_y
-        distance = math.sqrt(dx*dx + dy*dy)
+        distance_sq = dx*dx + dy*dy
         
-        if distance < 5:  # Close enough
+        if distance_sq < 25:  # Close enough (within 5 units)
             return True
         
-        # Calculate angle to target
-        angle = math.atan2(dy, dx) * 180 / math.pi
-        
-        # Turn towards target (simplified)
-        if angle > 10:
-            self.turn_right(min(angle, 45))
-        elif angle < -10:
-            self.turn_left(min(abs(angle), 45))
+        # Turn towards target (simplified). Comparing the offset against the
+        # 10 and 45 degree lines decides the turn without computing an angle;
+        # atan is only needed when the turn is under the 45 degree cap
+        offset = abs(dy)
+        if offset > _TAN_10 * dx:
+            angle = 45 if offset >= dx else math.degrees(math.atan(offset / dx))
+            if dy >= 0:  # Straight behind counts as a right turn
+                self.turn_right(angle)
+            else:
+                self.turn_left(angle)
         
         # Move forward
-        move_time = min(distance / 20, 2.0)  # Adjust speed based on distance
+        move_time = min(math.sqrt(distance_sq) / 20, 2.0)  # Adjust speed based on distance
         self.move_forward(move_time)
         
         return False  # Not yet at destination
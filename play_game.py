@@ -6,58 +6,209 @@ Main script that uses AWS Nova to make intelligent gameplay decisions
 based on real-time game state analysis.
 """
 
+import io
 import os
+import signal
+import sys
 import time
 import json
+import atexit
+import queue
+import threading
+from collections import deque
+from itertools import islice
 from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
 
-from COH_BOT.llm_integrations import NovaGameplayAI
-from COH_BOT.game_state import GameStateMonitor
-from COH_BOT import player_movement, player_attacks
+try:
+    import orjson
+except ImportError:  # Session logs then use the stdlib encoders below
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional; only needed for COH_LOG_FORMAT=msgpack
+    msgpack = None
 
 # Load environment variables
 load_dotenv()
 
+# Queue sentinel telling the log writer thread to finish
+_STOP = object()
+
+# Every possible 10-segment progress bar, indexed by filled segments
+_BARS = tuple("█" * i + "░" * (10 - i) for i in range(11))
+
+# Console summary printed for each decision
+_SUMMARY = "[{time}] {status} Action: {action} - {reason}"
+
+# Stdlib encoder configured once, matching orjson's compact UTF-8 output
+_encode = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False).encode
+
+
+def _line(entry) -> bytes:
+    """Serialize a log entry to one UTF-8 JSON line."""
+    if orjson is not None:
+        return orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE)
+    return (_encode(entry) + '\n').encode()
+
+
+def _loads(data: bytes):
+    """Parse UTF-8 JSON, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _snapshot_bytes(obj) -> bytes:
+    """Serialize to compact UTF-8 JSON; tools/pretty_log.py indents it on demand."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return _encode(obj).encode()
+
+
 class GameplayLogger:
     """Logs all gameplay decisions and actions."""
     
     def __init__(self):
-        """Initialize logger with logs directory."""
+        """Initialize logger paths; files are created on the first log."""
         self.logs_dir = Path("logs")
-        self.logs_dir.mkdir(exist_ok=True)
         
-        # Create session log file
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # Entries are streamed as JSON lines, or as msgpack records when
+        # COH_LOG_FORMAT=msgpack, for high-frequency sessions
+        self.log_format = os.getenv('COH_LOG_FORMAT', 'jsonl').lower()
+        if self.log_format not in ('jsonl', 'msgpack'):
+            print(f"⚠️  Unknown COH_LOG_FORMAT '{self.log_format}'; logging as JSONL")
+            self.log_format = 'jsonl'
+        elif self.log_format == 'msgpack' and msgpack is None:
+            print("⚠️  msgpack is not installed; logging as JSONL")
+            self.log_format = 'jsonl'
+        
+        # Session log files: entries are streamed to the session stream as
+        # they happen, and the full history is written once to the JSON
+        # snapshot on cleanup
+        # Microseconds keep loggers created in the same second apart
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
         self.session_file = self.logs_dir / f"gameplay_session_{timestamp}.json"
-        self.action_history = []
+        self.session_stream = self.session_file.with_suffix(f'.{self.log_format}')
+        
+        # Only the latest entries stay in memory; the session stream holds
+        # the full session
+        self.action_history = deque(maxlen=int(os.getenv('COH_HISTORY_CAP', 256)))
+        self.total_actions = 0
+        
+        # 0 keeps history only, 1 also writes the session log, 2 also prints
+        self.level = int(os.getenv('COH_LOG_LEVEL', 2))
+        
+        # Entries are serialized and written by a background thread, so the
+        # gameplay loop only pays for a queue put
+        self._fh = None
+        self._q = queue.Queue()
+        self._writer = threading.Thread(target=self._drain, daemon=True)
+        atexit.register(self.cleanup)
+    
+    def _open(self):
+        """Create the logs directory and session stream, and start the writer."""
+        self.logs_dir.mkdir(exist_ok=True)
+        # Exclusive create: a stream is never shared with another session
+        self._fh = open(self.session_stream, 'xb', buffering=1 << 16)
+        self._writer.start()
+    
+    def _drain(self):
+        """Write queued entries to the session stream in batches."""
+        # The packer is only ever used from this thread
+        if self.log_format == 'msgpack':
+            serialize = msgpack.Packer(use_bin_type=True).pack
+        else:
+            serialize = _line
+        
+        while True:
+            batch = [self._q.get()]
+            
+            # Gather whatever else arrives within 100ms into the same write
+            deadline = time.monotonic() + 0.1
+            while batch[-1] is not _STOP and len(batch) < 64:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._q.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            
+            stop = batch[-1] is _STOP
+            if stop:
+                batch.pop()
+            
+            # A bad entry or a failed write is reported and dropped; the
+            # thread keeps running so later entries are still logged
+            lines = []
+            for entry in batch:
+                try:
+                    lines.append(serialize(entry))
+                except Exception as e:
+                    print(f"⚠️  Could not serialize log entry: {e}")
+            try:
+                self._fh.writelines(lines)
+                self._fh.flush()
+            except Exception as e:
+                print(f"⚠️  Could not write session log: {e}")
+            
+            if stop:
+                return
     
     def log_decision(self, decision: dict, execution_success: bool):
         """Log an AI decision and its execution result."""
+        now = datetime.now()
+        self.total_actions += 1
         log_entry = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now.isoformat(),
             "decision": decision,
             "execution_success": execution_success,
-            "session_action_count": len(self.action_history) + 1
+            "session_action_count": self.total_actions
         }
         
         self.action_history.append(log_entry)
         
-        # Write to file
-        with open(self.session_file, 'w') as f:
-            json.dump(self.action_history, f, indent=2)
+        # Hand off to the writer thread
+        if self.level >= 1:
+            if self._fh is None:
+                self._open()
+            self._q.put(log_entry)
         
         # Print summary
-        action = decision.get('action', 'unknown')
-        reason = decision.get('reason', 'no reason provided')
-        status = "✓" if execution_success else "✗"
-        
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] {status} Action: {action} - {reason}")
+        if self.level >= 2:
+            print(_SUMMARY.format_map({
+                'time': now.strftime('%H:%M:%S'),
+                'status': "✓" if execution_success else "✗",
+                'action': decision.get('action', 'unknown'),
+                'reason': decision.get('reason', 'no reason provided'),
+            }))
     
     def get_recent_actions(self, count: int = 5) -> list:
         """Get the most recent actions for context."""
-        return self.action_history[-count:] if self.action_history else []
+        history = self.action_history
+        return list(islice(history, max(0, len(history) - count), None))
+    
+    def cleanup(self):
+        """Write any queued entries, close the stream and save the snapshot."""
+        if self._fh is None:
+            return  # Nothing was logged, so no files were created
+        if self._writer.is_alive():
+            self._q.put(_STOP)
+            self._writer.join()
+        if not self._fh.closed:
+            self._fh.close()
+            
+            # Snapshot of the whole session, rebuilt from the stream
+            # since memory only holds the latest entries
+            with open(self.session_stream, 'rb') as f:
+                if self.log_format == 'msgpack':
+                    entries = list(msgpack.Unpacker(f, raw=False))
+                else:
+                    entries = [_loads(line) for line in f]
+            self.session_file.write_bytes(_snapshot_bytes(entries))
 
 
 class COHGameplayBot:
@@ -65,17 +216,27 @@ class COHGameplayBot:
     
     def __init__(self):
         """Initialize the gameplay bot."""
+        # Imported here so loading this module (and failing validation)
+        # doesn't pay for OpenCV, pyautogui and boto3
+        from COH_BOT.llm_integrations import NovaGameplayAI
+        
+        # Share the AI's monitor so each cycle captures the screen once and
+        # the display, log and prompt all see the same stats
         self.ai = NovaGameplayAI()
-        self.monitor = GameStateMonitor()
+        self.monitor = self.ai.game_monitor
         self.logger = GameplayLogger()
         self.decision_interval = int(os.getenv('DECISION_INTERVAL', 5))
         self.running = False
+        self._stop = threading.Event()
+        self._waiting = False
+        self._last_display_tuple = None
         
         print("🦸 City of Heroes AI Bot Initialized")
         print(f"⏱️  Decision interval: {self.decision_interval} seconds")
         print(f"📁 Logs directory: {self.logger.logs_dir}")
     
-    def validate_environment(self) -> bool:
+    @staticmethod
+    def validate_environment() -> bool:
         """Validate AWS credentials and environment setup."""
         required_vars = ['AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY']
         missing_vars = [var for var in required_vars if not os.getenv(var)]
@@ -88,7 +249,7 @@ class COHGameplayBot:
         print("✅ Environment validation passed")
         return True
     
-    def display_game_state(self, stats: dict):
+    def display_game_state(self, stats: dict, out=None):
         """Display current game state in a readable format."""
         health = stats.get('health', 0)
         endurance = stats.get('endurance', 0)
@@ -96,65 +257,135 @@ class COHGameplayBot:
         in_combat = stats.get('in_combat', False)
         enemy_targeted = stats.get('enemy_targeted', False)
         
+        # Skip formatting when everything shown would match the last display
+        key = (round(health), round(endurance), round(experience),
+               int(health) // 10, int(endurance) // 10, in_combat, enemy_targeted)
+        if key == self._last_display_tuple:
+            print("\n📊 Game State: unchanged", file=out)
+            return
+        self._last_display_tuple = key
+        
         # Create health/endurance bars
-        health_bar = "█" * (health // 10) + "░" * (10 - health // 10)
-        endurance_bar = "█" * (endurance // 10) + "░" * (10 - endurance // 10)
+        health_bar = _BARS[min(int(health) // 10, 10)]
+        endurance_bar = _BARS[min(int(endurance) // 10, 10)]
         
         combat_status = "⚔️ COMBAT" if in_combat else "🌍 EXPLORE"
         target_status = "🎯 TARGETED" if enemy_targeted else "👁️ SCANNING"
         
-        print(f"\n📊 Game State:")
-        print(f"   Health: {health:3.0f}% [{health_bar}]")
-        print(f"   Endurance: {endurance:3.0f}% [{endurance_bar}]")
-        print(f"   Experience: {experience:3.0f}%")
-        print(f"   Status: {combat_status} | {target_status}")
+        print(f"\n📊 Game State:", file=out)
+        print(f"   Health: {health:3.0f}% [{health_bar}]", file=out)
+        print(f"   Endurance: {endurance:3.0f}% [{endurance_bar}]", file=out)
+        print(f"   Experience: {experience:3.0f}%", file=out)
+        print(f"   Status: {combat_status} | {target_status}", file=out)
+    
+    def _render_cycle(self, out, cycle_n: int, stats: dict):
+        """Write the cycle banner and game state shown before consulting the AI."""
+        rule = '=' * 50
+        out.write(f"\n{rule}\n🤖 AI Decision Cycle #{cycle_n}\n{rule}\n")
+        self.display_game_state(stats, out)
+        out.write("\n🧠 Consulting AI for next action...\n")
+    
+    def _render_recent(self, out, recent_actions: list):
+        """Write the recent action history and the wait notice ending a cycle."""
+        if recent_actions:
+            out.write("\n📋 Recent Actions:\n")
+            for i, entry in enumerate(recent_actions, 1):
+                action = entry['decision'].get('action', 'unknown')
+                status = "✓" if entry['execution_success'] else "✗"
+                out.write(f"   {i}. {status} {action}\n")
+        out.write(f"\n⏳ Waiting {self.decision_interval} seconds before next decision...\n")
+    
+    def _emit(self, render, *args):
+        """Render output into a buffer and write it to stdout in one call."""
+        out = io.StringIO()
+        render(out, *args)
+        sys.stdout.write(out.getvalue())
+        sys.stdout.flush()
+    
+    def stop(self):
+        """Ask the gameplay loop to stop, waking it if it is waiting."""
+        self.running = False
+        self._stop.set()
+    
+    def _handle_sigint(self, signum, frame):
+        """Stop after the current step on Ctrl+C; abort on a second Ctrl+C."""
+        # Only a plain flag is touched here: the interrupted code may hold
+        # the stop event's lock or be midway through a stdout write, so
+        # neither set() nor print() is safe. Between decisions, and on a
+        # second Ctrl+C, interrupt the loop outright
+        if self._waiting or not self.running:
+            raise KeyboardInterrupt
+        self.running = False
     
     def run_gameplay_loop(self):
         """Main gameplay loop with AI decision making."""
         self.running = True
+        self._stop.clear()
         action_count = 0
         
+        # Signal handlers can only be installed from the main thread
+        previous_handler = None
+        if threading.current_thread() is threading.main_thread():
+            previous_handler = signal.signal(signal.SIGINT, self._handle_sigint)
+        
         print("\n🚀 Starting AI gameplay loop...")
-        print("Press Ctrl+C to stop the bot\n")
+        print("Press Ctrl+C to stop the bot (twice to abort the current action)\n")
+        
+        # Bind the per-cycle calls once rather than looking them up each loop
+        get_stats = self.monitor.get_player_stats
+        detect_combat = self.monitor.detect_combat_state
+        detect_target = self.monitor.detect_enemy_target
+        make_decision = self.ai.make_gameplay_decision
+        execute = self.ai.execute_decision
+        log = self.logger.log_decision
+        recent = self.logger.get_recent_actions
+        emit = self._emit
+        wait = self._stop.wait
+        interval = self.decision_interval
         
         try:
             while self.running:
                 action_count += 1
-                print(f"\n{'='*50}")
-                print(f"🤖 AI Decision Cycle #{action_count}")
-                print(f"{'='*50}")
                 
                 # Get current game state
-                stats = self.monitor.get_player_stats()
-                stats['in_combat'] = self.monitor.detect_combat_state()
-                stats['enemy_targeted'] = self.monitor.detect_enemy_target()
+                stats = get_stats()
+                stats['in_combat'] = detect_combat(stats)
+                stats['enemy_targeted'] = detect_target()
                 
-                # Display current state
-                self.display_game_state(stats)
+                # Display the cycle header and current state in one write
+                emit(self._render_cycle, action_count, stats)
+                
+                # Don't spend a Nova call if a stop was requested meanwhile
+                if not self.running:
+                    break
                 
                 # Get AI decision
-                print("\n🧠 Consulting AI for next action...")
-                decision = self.ai.make_gameplay_decision()
+                decision = make_decision(stats)
+                
+                # Don't press any game keys once a stop was requested
+                if not self.running:
+                    break
                 
                 # Execute decision
                 print(f"🎮 Executing: {decision.get('action', 'unknown')}")
-                execution_success = self.ai.execute_decision(decision)
+                execution_success = execute(decision)
                 
                 # Log the decision
-                self.logger.log_decision(decision, execution_success)
+                log(decision, execution_success)
                 
                 # Show recent action history
-                recent_actions = self.logger.get_recent_actions(3)
-                if recent_actions:
-                    print(f"\n📋 Recent Actions:")
-                    for i, entry in enumerate(recent_actions[-3:], 1):
-                        action = entry['decision'].get('action', 'unknown')
-                        status = "✓" if entry['execution_success'] else "✗"
-                        print(f"   {i}. {status} {action}")
+                emit(self._render_recent, recent(3))
                 
-                # Wait before next decision
-                print(f"\n⏳ Waiting {self.decision_interval} seconds before next decision...")
-                time.sleep(self.decision_interval)
+                # Wait before next decision, returning at once if stopped. The
+                # flag is raised first so a Ctrl+C from here on interrupts
+                self._waiting = True
+                try:
+                    if not self.running or wait(interval):
+                        break
+                finally:
+                    self._waiting = False
+            
+            print("\n\n🛑 Stopping gameplay bot...")
                 
         except KeyboardInterrupt:
             print("\n\n🛑 Stopping gameplay bot...")
@@ -163,14 +394,18 @@ class COHGameplayBot:
             print(f"\n❌ Unexpected error: {e}")
             self.running = False
         finally:
+            if previous_handler is not None:
+                signal.signal(signal.SIGINT, previous_handler)
             self.cleanup()
     
     def cleanup(self):
         """Cleanup and save final logs."""
         print("📁 Saving final logs...")
-        total_actions = len(self.logger.action_history)
+        self.logger.cleanup()
+        total_actions = self.logger.total_actions
         print(f"✅ Session completed: {total_actions} total actions logged")
         print(f"📋 Log file: {self.logger.session_file}")
+        print(f"📋 Event stream: {self.logger.session_stream}")
 
 
 def main():
@@ -178,13 +413,13 @@ def main():
     print("🦸‍♂️ City of Heroes AI Gameplay Bot")
     print("=" * 40)
     
+    # Validate environment before loading the heavy game modules
+    if not COHGameplayBot.validate_environment():
+        return
+    
     # Create bot instance
     bot = COHGameplayBot()
     
-    # Validate environment
-    if not bot.validate_environment():
-        return
-    
     # Start gameplay loop
     bot.run_gameplay_loop()
 
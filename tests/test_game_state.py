@@ -24,32 +24,71 @@ class TestGameStateMonitor(unittest.TestCase):
         self.assertIn('health_bar', self.monitor.ui_regions)
         self.assertIn('health_red', self.monitor.color_ranges)
     
-    @patch('COH_BOT.game_state.pyautogui.screenshot')
-    @patch('COH_BOT.game_state.cv2.cvtColor')
-    def test_take_screenshot(self, mock_cvtColor, mock_screenshot):
+    def _mock_grab(self, width, height):
+        """Build a fake mss screenshot of the given size."""
+        shot = MagicMock()
+        shot.width = width
+        shot.height = height
+        shot.raw = bytearray(width * height * 4)
+        return shot
+    
+    @patch('COH_BOT.game_state.mss.mss')
+    def test_take_screenshot(self, mock_mss):
         """Test screenshot capture."""
-        # Mock PIL image
-        mock_pil_image = MagicMock()
-        mock_screenshot.return_value = mock_pil_image
+        sct = mock_mss.return_value
+        sct.monitors = [{}, {'left': 0, 'top': 0, 'width': 100, 'height': 100}]
+        sct.grab.return_value = self._mock_grab(100, 100)
         
-        # Mock numpy array conversion
-        mock_array = np.zeros((100, 100, 3), dtype=np.uint8)
-        with patch('COH_BOT.game_state.np.array', return_value=mock_array):
-            result = self.monitor.take_screenshot()
+        result = self.monitor.take_screenshot()
         
-        mock_screenshot.assert_called_once()
-        mock_cvtColor.assert_called_once()
+        sct.grab.assert_called_once_with(sct.monitors[1])
+        self.assertEqual(result.shape, (100, 100, 3))
+        self.assertTrue(result.flags['C_CONTIGUOUS'])
     
-    @patch('COH_BOT.game_state.pyautogui.screenshot')
-    def test_take_screenshot_with_region(self, mock_screenshot):
+    @patch('COH_BOT.game_state.mss.mss')
+    def test_take_screenshot_with_region(self, mock_mss):
         """Test screenshot capture with specific region."""
         region = (10, 10, 100, 100)
+        sct = mock_mss.return_value
+        sct.grab.return_value = self._mock_grab(100, 100)
+        
+        self.monitor.take_screenshot(region)
+        self.monitor.take_screenshot(region)
+        
+        sct.grab.assert_called_with({'left': 10, 'top': 10, 'width': 100, 'height': 100})
+        mock_mss.assert_called_once()  # Grabber is reused across captures
+    
+    @patch('COH_BOT.game_state.mss.mss')
+    def test_take_screenshot_with_list_region(self, mock_mss):
+        """Test that a region given as a list is accepted and cached."""
+        sct = mock_mss.return_value
+        sct.grab.return_value = self._mock_grab(10, 10)
+        
+        first = self.monitor.take_screenshot([0, 0, 10, 10])
+        second = self.monitor.take_screenshot((0, 0, 10, 10))
+        
+        self.assertIs(first, second)
+    
+    @patch('COH_BOT.game_state.time.monotonic')
+    @patch('COH_BOT.game_state.mss.mss')
+    def test_take_screenshot_reuses_recent_frame(self, mock_mss, mock_monotonic):
+        """Test that a capture younger than frame_ttl is reused."""
+        sct = mock_mss.return_value
+        sct.grab.return_value = self._mock_grab(100, 100)
+        region = (10, 10, 100, 100)
+        
+        mock_monotonic.return_value = 100.0
+        first = self.monitor.take_screenshot(region)
+        mock_monotonic.return_value = 100.01
+        second = self.monitor.take_screenshot(region)
         
-        with patch('COH_BOT.game_state.cv2.cvtColor'):
-            with patch('COH_BOT.game_state.np.array'):
-                self.monitor.take_screenshot(region)
+        self.assertIs(first, second)
+        self.assertEqual(sct.grab.call_count, 1)
         
-        mock_screenshot.assert_called_with(region=(10, 10, 100, 100))
+        # A stale frame is captured again
+        mock_monotonic.return_value = 100.2
+        self.monitor.take_screenshot(region)
+        self.assertEqual(sct.grab.call_count, 2)
     
     def test_extract_bar_percentage_full(self):
         """Test percentage extraction from full bar."""
@@ -82,19 +121,107 @@ class TestGameStateMonitor(unittest.TestCase):
         # Should detect 0% or very low percentage
         self.assertLess(percentage, 10)
     
+    def test_extract_bar_percentage_ignores_thin_edges(self):
+        """Test that a thin line of matching pixels is not counted as fill."""
+        test_image = np.zeros((50, 300, 3), dtype=np.uint8)
+        test_image[10:30, 50:100] = [255, 0, 0]   # Blue fill, a quarter of the bar
+        test_image[29:30, 100:250] = [255, 0, 0]  # Anti-aliased bottom edge
+        
+        percentage = self.monitor.extract_bar_percentage_bgr(
+            test_image, self.monitor.bgr_ranges['endurance_blue'], (50, 10, 200, 20)
+        )
+        
+        self.assertAlmostEqual(percentage, 25)
+    
     @patch('COH_BOT.game_state.GameStateMonitor.take_screenshot')
-    @patch('COH_BOT.game_state.GameStateMonitor.extract_bar_percentage')
-    def test_get_health_percentage(self, mock_extract, mock_screenshot):
+    def test_get_health_percentage(self, mock_screenshot):
         """Test health percentage retrieval."""
-        mock_extract.side_effect = [75, 0]  # Green health: 75%, Red health: 0%
+        # Capture covers the bars and target info, starting at the health bar
+        bbox = self.monitor._bbox
+        self.assertEqual(bbox, (50, 50, 750, 100))
+        
+        # Green health bar filled across 150 of its 200 columns
+        frame = np.zeros((bbox[3], bbox[2], 3), dtype=np.uint8)
+        frame[0:20, 0:150] = [0, 255, 0]
+        mock_screenshot.return_value = frame
+        
+        health = self.monitor.get_health_percentage()
+        
+        self.assertAlmostEqual(health, 75)
+        mock_screenshot.assert_called_once_with(bbox)
+    
+    def test_extract_bar_percentage_bgr(self):
+        """Test percentage extraction with BGR thresholds."""
+        test_image = np.zeros((50, 300, 3), dtype=np.uint8)
+        test_image[10:30, 50:150] = [255, 0, 0]  # Blue bar, half full
+        
+        percentage = self.monitor.extract_bar_percentage_bgr(
+            test_image, self.monitor.bgr_ranges['endurance_blue'], (50, 10, 200, 20)
+        )
+        
+        self.assertAlmostEqual(percentage, 50)
+    
+    def test_extract_bar_percentage_bgr_clipped(self):
+        """Test that a bar running past the image edge is measured on its visible part."""
+        test_image = np.zeros((50, 200, 3), dtype=np.uint8)
+        test_image[10:30, 50:200] = [255, 0, 0]  # Blue across every visible column
+        
+        percentage = self.monitor.extract_bar_percentage_bgr(
+            test_image, self.monitor.bgr_ranges['endurance_blue'], (50, 10, 200, 20)
+        )
+        
+        self.assertAlmostEqual(percentage, 100)
+    
+    @patch('COH_BOT.game_state._bars_pct_kernel', None)
+    @patch('COH_BOT.game_state._bar_pct_kernel', None)
+    def test_extract_bar_percentage_bgr_opencv_fallback(self):
+        """Test the OpenCV path, including a bar larger than the scratch buffer."""
+        green = self.monitor.bgr_ranges['health_green']
+        test_image = np.zeros((50, 400, 3), dtype=np.uint8)
+        test_image[10:30, 0:300] = [0, 255, 0]
+        
+        self.assertAlmostEqual(
+            self.monitor.extract_bar_percentage_bgr(test_image, green, (0, 10, 300, 20)), 100
+        )
+        self.assertAlmostEqual(
+            self.monitor.extract_bar_percentage_bgr(test_image, green, (0, 10, 400, 20)), 75
+        )
+        
+        # An oversized region must not count what an earlier read left behind
+        blank = np.zeros((50, 400, 3), dtype=np.uint8)
+        self.assertEqual(
+            self.monitor.extract_bar_percentage_bgr(blank, green, (0, 10, 400, 30)), 0
+        )
+    
+    @patch('COH_BOT.game_state.GameStateMonitor.take_screenshot')
+    def test_get_health_percentage_mixed_colors(self, mock_screenshot):
+        """Test that green and red health pixels are counted together."""
+        bbox = self.monitor._bbox
+        frame = np.zeros((bbox[3], bbox[2], 3), dtype=np.uint8)
+        frame[0:20, 0:100] = [0, 255, 0]    # Green part of the bar
+        frame[0:20, 100:150] = [0, 0, 255]  # Red part of the bar
+        mock_screenshot.return_value = frame
         
         health = self.monitor.get_health_percentage()
         
-        self.assertEqual(health, 75)
-        self.assertEqual(mock_extract.call_count, 2)  # Called for both colors
+        self.assertAlmostEqual(health, 75)
+    
+    @patch('COH_BOT.game_state.GameStateMonitor.take_screenshot')
+    def test_edited_ui_regions_move_capture(self, mock_screenshot):
+        """Test that editing ui_regions by hand is picked up by the next read."""
+        self.monitor.ui_regions['health_bar'] = (100, 200, 200, 20)
+        mock_screenshot.return_value = np.zeros((300, 800, 3), dtype=np.uint8)
+        
+        self.monitor.get_health_percentage()
+        
+        bbox = mock_screenshot.call_args[0][0]
+        self.assertEqual(bbox, self.monitor._bbox)
+        self.assertEqual(bbox[:2], (50, 50))
+        self.assertEqual(bbox[1] + bbox[3], 220)  # Reaches the moved health bar
+        self.assertEqual(self.monitor._rel_regions['health_bar'][:2], (50, 150))
     
     @patch('COH_BOT.game_state.GameStateMonitor.take_screenshot')
-    @patch('COH_BOT.game_state.GameStateMonitor.extract_bar_percentage')
+    @patch('COH_BOT.game_state.GameStateMonitor.extract_bar_percentage_bgr')
     def test_get_endurance_percentage(self, mock_extract, mock_screenshot):
         """Test endurance percentage retrieval."""
         mock_extract.return_value = 85
@@ -105,7 +232,7 @@ class TestGameStateMonitor(unittest.TestCase):
         mock_extract.assert_called_once()
     
     @patch('COH_BOT.game_state.GameStateMonitor.take_screenshot')
-    @patch('COH_BOT.game_state.GameStateMonitor.extract_bar_percentage')
+    @patch('COH_BOT.game_state.GameStateMonitor.extract_bar_percentage_bgr')
     def test_get_experience_percentage(self, mock_extract, mock_screenshot):
         """Test experience percentage retrieval."""
         mock_extract.return_value = 45
@@ -115,44 +242,83 @@ class TestGameStateMonitor(unittest.TestCase):
         self.assertEqual(experience, 45)
         mock_extract.assert_called_once()
     
-    @patch('COH_BOT.game_state.GameStateMonitor.get_health_percentage')
-    @patch('COH_BOT.game_state.GameStateMonitor.get_endurance_percentage')
-    @patch('COH_BOT.game_state.GameStateMonitor.get_experience_percentage')
-    def test_get_player_stats(self, mock_exp, mock_end, mock_health):
+    @patch('COH_BOT.game_state.GameStateMonitor.take_screenshot')
+    def test_get_player_stats(self, mock_screenshot):
         """Test comprehensive player stats retrieval."""
-        mock_health.return_value = 90
-        mock_end.return_value = 70
-        mock_exp.return_value = 60
+        bbox = self.monitor._bbox
+        frame = np.zeros((bbox[3], bbox[2], 3), dtype=np.uint8)
+        frame[0:20, 0:180] = [0, 255, 0]      # Health 90%
+        frame[30:50, 0:140] = [255, 0, 0]     # Endurance 70%
+        frame[60:75, 0:180] = [0, 255, 255]   # Experience 60%
+        mock_screenshot.return_value = frame
         
         stats = self.monitor.get_player_stats()
         
-        self.assertEqual(stats['health'], 90)
-        self.assertEqual(stats['endurance'], 70)
-        self.assertEqual(stats['experience'], 60)
+        self.assertAlmostEqual(stats['health'], 90)
+        self.assertAlmostEqual(stats['endurance'], 70)
+        self.assertAlmostEqual(stats['experience'], 60)
         self.assertIn('timestamp', stats)
+        mock_screenshot.assert_called_once()  # One capture shared by all bars
     
     @patch('COH_BOT.game_state.GameStateMonitor.take_screenshot')
     @patch('COH_BOT.game_state.cv2.Canny')
     @patch('COH_BOT.game_state.cv2.countNonZero')
     def test_detect_enemy_target_present(self, mock_count, mock_canny, mock_screenshot):
         """Test enemy target detection when target is present."""
+        mock_screenshot.return_value = np.zeros((100, 750, 3), dtype=np.uint8)
         mock_count.return_value = 150  # Above threshold
         
         result = self.monitor.detect_enemy_target()
         
         self.assertTrue(result)
     
+    def test_detect_enemy_target_clipped_frame(self):
+        """Test that a frame cutting off the target info is still checked."""
+        frame = np.zeros((60, 700, 3), dtype=np.uint8)
+        frame[10:50, 560:690] = 255  # Bright box inside the visible part
+        
+        self.assertTrue(self.monitor._target_from(frame))
+        self.assertFalse(self.monitor._target_from(np.zeros((60, 700, 3), dtype=np.uint8)))
+        
+        # A sliver too thin to downsample counts as no target
+        sliver = np.full((2, 700, 3), 255, dtype=np.uint8)
+        sliver[:, 560:690:2] = 0
+        self.assertFalse(self.monitor._target_from(sliver))
+    
     @patch('COH_BOT.game_state.GameStateMonitor.take_screenshot')
     @patch('COH_BOT.game_state.cv2.Canny')
     @patch('COH_BOT.game_state.cv2.countNonZero')
     def test_detect_enemy_target_absent(self, mock_count, mock_canny, mock_screenshot):
         """Test enemy target detection when no target is present."""
-        mock_count.return_value = 50  # Below threshold
+        mock_screenshot.return_value = np.zeros((100, 750, 3), dtype=np.uint8)
+        mock_count.return_value = 10  # Below threshold
         
         result = self.monitor.detect_enemy_target()
         
         self.assertFalse(result)
     
+    @patch('COH_BOT.game_state.GameStateMonitor.take_screenshot')
+    @patch('COH_BOT.game_state.cv2.Canny')
+    @patch('COH_BOT.game_state.cv2.countNonZero')
+    def test_detect_enemy_target_cached(self, mock_count, mock_canny, mock_screenshot):
+        """Test that unchanged target info reuses the previous result."""
+        frame = np.zeros((100, 750, 3), dtype=np.uint8)
+        mock_screenshot.return_value = frame
+        mock_count.return_value = 150
+        
+        self.assertTrue(self.monitor.detect_enemy_target())
+        self.assertTrue(self.monitor.detect_enemy_target())
+        self.assertEqual(mock_canny.call_count, 1)
+        
+        # Changed pixels force a fresh detection
+        changed = frame.copy()
+        changed[10, 600] = [255, 255, 255]  # Inside the target info region
+        mock_screenshot.return_value = changed
+        mock_count.return_value = 10
+        
+        self.assertFalse(self.monitor.detect_enemy_target())
+        self.assertEqual(mock_canny.call_count, 2)
+    
     @patch('COH_BOT.game_state.GameStateMonitor.get_player_stats')
     def test_detect_combat_state_in_combat(self, mock_stats):
         """Test combat detection when in combat."""
@@ -178,6 +344,15 @@ class TestGameStateMonitor(unittest.TestCase):
         
         self.assertFalse(result)
     
+    @patch('COH_BOT.game_state.GameStateMonitor.get_player_stats')
+    def test_detect_combat_state_with_stats(self, mock_stats):
+        """Test combat detection from stats read earlier in the tick."""
+        self.monitor.detect_combat_state({'endurance': 80})
+        result = self.monitor.detect_combat_state({'endurance': 60})
+        
+        self.assertTrue(result)
+        mock_stats.assert_not_called()
+    
     @patch('COH_BOT.game_state.GameStateMonitor.get_health_percentage')
     @patch('COH_BOT.game_state.time.sleep')
     def test_wait_for_health_recovery_success(self, mock_sleep, mock_health):
@@ -213,6 +388,48 @@ class TestGameStateMonitor(unittest.TestCase):
         # Values should be scaled down
         self.assertLess(new_health_region[0], original_health_region[0])
         self.assertLess(new_health_region[1], original_health_region[1])
+        self.assertEqual(self.monitor._bbox[:2], new_health_region[:2])
+    
+    def test_calibrate_ui_regions_repeated(self):
+        """Test that calibrating again scales from the reference layout."""
+        original_regions = dict(self.monitor.ui_regions)
+        
+        self.monitor.calibrate_ui_regions((1280, 720))
+        scaled_regions = dict(self.monitor.ui_regions)
+        self.monitor.calibrate_ui_regions((1280, 720))
+        
+        self.assertEqual(self.monitor.ui_regions, scaled_regions)
+        
+        # Returning to the reference resolution restores the original regions
+        self.monitor.calibrate_ui_regions((1920, 1080))
+        self.assertEqual(self.monitor.ui_regions, original_regions)
+    
+    def test_calibrate_ui_regions_keeps_edits(self):
+        """Test that hand-edited regions survive calibration."""
+        self.monitor.ui_regions['health_bar'] = (70, 60, 220, 24)
+        
+        self.monitor.calibrate_ui_regions((1920, 1080))
+        self.assertEqual(self.monitor.ui_regions['health_bar'], (70, 60, 220, 24))
+        
+        # Edits made at another resolution are scaled from that resolution
+        self.monitor.calibrate_ui_regions((960, 540))
+        self.monitor.ui_regions['health_bar'] = (40, 30, 100, 12)
+        self.monitor.calibrate_ui_regions((1920, 1080))
+        self.assertEqual(self.monitor.ui_regions['health_bar'], (80, 60, 200, 24))
+
+    
+    def test_calibrate_bar_colors(self):
+        """Test fitting BGR ranges to the bar colors on screen."""
+        frame = np.zeros((200, 400, 3), dtype=np.uint8)
+        frame[80:100, 50:250] = [200, 60, 20]  # Endurance bar in a custom blue
+        
+        self.monitor.calibrate_bar_colors(frame, margin=10)
+        
+        lower, upper = self.monitor.bgr_ranges['endurance_blue']
+        self.assertEqual(lower, (190, 50, 10))
+        self.assertEqual(upper, (210, 70, 30))
+        # Bars with no matching pixels keep their defaults
+        self.assertEqual(self.monitor.bgr_ranges['health_red'], ((0, 0, 100), (100, 100, 255)))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,84 @@
+"""
+Unit tests for llm_integrations module.
+"""
+
+import json
+import unittest
+from unittest.mock import patch
+from COH_BOT.llm_integrations import NovaGameplayAI
+
+
+class FakeStream:
+    """Bedrock response body that yields text deltas and records its use."""
+    
+    def __init__(self, texts):
+        """Store the text deltas to stream."""
+        self.texts = texts
+        self.consumed = 0
+        self.closed = False
+    
+    def __iter__(self):
+        """Yield each text delta as a Bedrock stream event."""
+        for text in self.texts:
+            self.consumed += 1
+            event = {'contentBlockDelta': {'delta': {'text': text}}}
+            yield {'chunk': {'bytes': json.dumps(event).encode()}}
+    
+    def close(self):
+        """Record that the caller closed the stream."""
+        self.closed = True
+
+
+class TestNovaGameplayAI(unittest.TestCase):
+    """Test cases for NovaGameplayAI streaming responses."""
+    
+    def setUp(self):
+        """Set up an AI with a mocked Bedrock client."""
+        with patch('COH_BOT.llm_integrations.boto3'):
+            self.ai = NovaGameplayAI()
+    
+    def _call(self, texts):
+        """Run call_nova_with_image against a stream of text deltas."""
+        stream = FakeStream(texts)
+        self.ai.bedrock_client.invoke_model_with_response_stream.return_value = {'body': stream}
+        return self.ai.call_nova_with_image('prompt'), stream
+    
+    def test_action_split_across_chunks(self):
+        """Test that an action split over chunks is returned once complete."""
+        decision, stream = self._call([
+            'Decision: {"act', 'ion": "attack", "rea', 'son": "enemy close"}',
+            ' That should work.', ' More text.'
+        ])
+        
+        self.assertEqual(decision, {'action': 'attack', 'reason': 'enemy close'})
+        self.assertEqual(stream.consumed, 3)  # Stopped reading early
+        self.assertTrue(stream.closed)
+    
+    def test_malformed_first_match(self):
+        """Test that a malformed object is skipped for a later valid one."""
+        decision, stream = self._call([
+            '{"action": attack}', ' Sorry, corrected: ', '{"action": "rest"}'
+        ])
+        
+        self.assertEqual(decision, {'action': 'rest'})
+        self.assertTrue(stream.closed)
+    
+    def test_no_match_falls_back_to_full_text(self):
+        """Test that text without an action object is parsed as a whole."""
+        decision, stream = self._call(['{"move": ', '"forward"}'])
+        
+        self.assertEqual(decision, {'move': 'forward'})
+        self.assertEqual(stream.consumed, 2)
+        self.assertTrue(stream.closed)
+    
+    def test_unparseable_response(self):
+        """Test that an unparseable response falls back to resting."""
+        decision, stream = self._call(['I am not ', 'sure what to do.'])
+        
+        self.assertEqual(decision['action'], 'rest')
+        self.assertIn('Failed to parse', decision['reason'])
+        self.assertTrue(stream.closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,211 @@
+"""
+Unit tests for the play_game module.
+"""
+
+import io
+import os
+import json
+import signal
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+import play_game
+from play_game import GameplayLogger, COHGameplayBot
+
+
+class TestGameplayLogger(unittest.TestCase):
+    """Test cases for GameplayLogger class."""
+    
+    def setUp(self):
+        """Run each test in an empty working directory."""
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+    
+    def tearDown(self):
+        """Restore the working directory and remove the test files."""
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+    
+    def _logger(self, level=1, log_format='jsonl'):
+        """Build a logger with the given log level and stream format."""
+        env = {'COH_LOG_LEVEL': str(level), 'COH_LOG_FORMAT': log_format}
+        with patch.dict(os.environ, env):
+            return GameplayLogger()
+    
+    def _log_actions(self, logger, count):
+        """Log count successful decisions with numbered actions."""
+        for i in range(count):
+            logger.log_decision({'action': f'action_{i}', 'reason': 'test'}, True)
+    
+    def test_no_files_before_first_log(self):
+        """Test that a logger creates nothing until it logs."""
+        logger = self._logger()
+        
+        self.assertFalse(os.path.exists('logs'))
+        
+        logger.cleanup()
+        self.assertFalse(os.path.exists('logs'))
+    
+    def test_cleanup_writes_all_entries(self):
+        """Test that the stream and snapshot hold every entry after cleanup."""
+        logger = self._logger()
+        self._log_actions(logger, 100)
+        
+        logger.cleanup()
+        
+        with open(logger.session_stream, encoding='utf-8') as f:
+            streamed = [json.loads(line) for line in f]
+        with open(logger.session_file, encoding='utf-8') as f:
+            snapshot = json.load(f)
+        
+        self.assertEqual(len(streamed), 100)
+        self.assertEqual(snapshot, streamed)
+        self.assertEqual([e['session_action_count'] for e in snapshot], list(range(1, 101)))
+    
+    def test_cleanup_is_idempotent(self):
+        """Test that a second cleanup leaves the files unchanged."""
+        logger = self._logger()
+        self._log_actions(logger, 3)
+        
+        logger.cleanup()
+        with open(logger.session_file, 'rb') as f:
+            first = f.read()
+        logger.cleanup()
+        
+        with open(logger.session_file, 'rb') as f:
+            self.assertEqual(f.read(), first)
+    
+    def test_level_zero_writes_nothing(self):
+        """Test that level 0 keeps history in memory only."""
+        logger = self._logger(level=0)
+        self._log_actions(logger, 5)
+        
+        logger.cleanup()
+        
+        self.assertFalse(os.path.exists('logs'))
+        self.assertEqual(logger.total_actions, 5)
+        self.assertEqual(len(logger.get_recent_actions(3)), 3)
+    
+    def test_bad_entry_does_not_stop_writer(self):
+        """Test that an unserializable entry is dropped and logging continues."""
+        logger = self._logger()
+        
+        with redirect_stdout(io.StringIO()) as out:
+            logger.log_decision({'action': object()}, True)
+            self._log_actions(logger, 2)
+            logger.cleanup()
+        
+        with open(logger.session_file, encoding='utf-8') as f:
+            snapshot = json.load(f)
+        self.assertEqual([e['session_action_count'] for e in snapshot], [2, 3])
+        self.assertIn('Could not serialize', out.getvalue())
+    
+    @unittest.skipIf(play_game.msgpack is None, "msgpack is not installed")
+    def test_msgpack_stream(self):
+        """Test that the msgpack stream round-trips into the snapshot."""
+        logger = self._logger(log_format='msgpack')
+        self._log_actions(logger, 3)
+        
+        logger.cleanup()
+        
+        self.assertEqual(logger.session_stream.suffix, '.msgpack')
+        with open(logger.session_file, encoding='utf-8') as f:
+            snapshot = json.load(f)
+        self.assertEqual([e['decision']['action'] for e in snapshot],
+                         ['action_0', 'action_1', 'action_2'])
+
+
+
+class TestCOHGameplayBot(unittest.TestCase):
+    """Test cases for the COHGameplayBot gameplay loop."""
+    
+    def setUp(self):
+        """Build a bot with a mocked AI in an empty working directory."""
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        
+        with patch.dict(os.environ, {'COH_LOG_LEVEL': '0', 'DECISION_INTERVAL': '5'}), \
+                patch('COH_BOT.llm_integrations.NovaGameplayAI'), \
+                redirect_stdout(io.StringIO()):
+            self.bot = COHGameplayBot()
+        
+        monitor = self.bot.monitor
+        monitor.get_player_stats.side_effect = lambda: {'health': 55, 'endurance': 80, 'experience': 10}
+        monitor.detect_combat_state.return_value = False
+        monitor.detect_enemy_target.return_value = False
+        self.bot.ai.make_gameplay_decision.return_value = {'action': 'rest', 'reason': 'test'}
+        self.bot.ai.execute_decision.return_value = True
+    
+    def tearDown(self):
+        """Restore the working directory and remove the test files."""
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+    
+    def _ctrl_c(self):
+        """Deliver Ctrl+C to the bot as its installed SIGINT handler would."""
+        signal.getsignal(signal.SIGINT)(signal.SIGINT, None)
+    
+    def _run(self):
+        """Run the gameplay loop, returning its console output and duration."""
+        start = time.monotonic()
+        with redirect_stdout(io.StringIO()) as out:
+            self.bot.run_gameplay_loop()
+        return out.getvalue(), time.monotonic() - start
+    
+    def test_stop_during_action(self):
+        """Test that Ctrl+C during an action ends the loop without waiting."""
+        def act(decision):
+            self._ctrl_c()
+            return True
+        self.bot.ai.execute_decision.side_effect = act
+        
+        output, elapsed = self._run()
+        
+        self.assertLess(elapsed, 1.0)  # Not the 5 second decision interval
+        self.bot.ai.execute_decision.assert_called_once()
+        self.assertNotIn('Waiting', output.split('🛑')[-1])
+        self.assertEqual(output.count('Stopping gameplay bot'), 1)
+        self.assertEqual(self.bot.logger.total_actions, 1)
+        self.assertIs(signal.getsignal(signal.SIGINT), signal.default_int_handler)
+    
+    def test_stop_during_stat_read(self):
+        """Test that Ctrl+C while reading stats skips the AI call."""
+        self.bot.monitor.detect_enemy_target.side_effect = lambda: self._ctrl_c() or False
+        
+        output, _ = self._run()
+        
+        self.bot.ai.make_gameplay_decision.assert_not_called()
+        self.bot.ai.execute_decision.assert_not_called()
+        self.assertIn('Stopping gameplay bot', output)
+    
+    def test_cycle_output(self):
+        """Test the per-cycle display, including an unchanged game state."""
+        self.bot.decision_interval = 0
+        calls = []
+        def act(decision):
+            calls.append(decision)
+            if len(calls) == 2:
+                self._ctrl_c()
+            return True
+        self.bot.ai.execute_decision.side_effect = act
+        
+        output, _ = self._run()
+        
+        self.assertIn('🤖 AI Decision Cycle #1', output)
+        self.assertIn('🤖 AI Decision Cycle #2', output)
+        self.assertIn('Health:  55% [█████░░░░░]', output)
+        self.assertEqual(output.count('📊 Game State: unchanged'), 1)
+        self.assertIn('   2. ✓ rest', output)
+        # The AI decides on the same stats that were displayed
+        stats = self.bot.ai.make_gameplay_decision.call_args[0][0]
+        self.assertEqual(stats['health'], 55)
+        self.assertFalse(stats['in_combat'])
+
+
+
+if __name__ == '__main__':
+    unittest.main()
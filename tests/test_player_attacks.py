@@ -4,7 +4,7 @@ Unit tests for player_attacks module.
 """
 
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, call
 import time
 from COH_BOT.player_attacks import AttackController
 
@@ -47,15 +47,51 @@ class TestAttackController(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.controller.use_ability(10)
     
-    @patch('COH_BOT.player_attacks.AttackController.use_ability')
+    @patch('COH_BOT.player_attacks.pyautogui')
     @patch('COH_BOT.player_attacks.time.sleep')
-    def test_execute_attack_chain(self, mock_sleep, mock_use_ability):
+    def test_execute_attack_chain(self, mock_sleep, mock_pyautogui):
         """Test executing a predefined attack chain."""
         self.controller.execute_attack_chain('basic_combo')
         
-        # Should call use_ability for each ability in basic_combo
-        expected_calls = len(self.controller.attack_chains['basic_combo'])
-        self.assertEqual(mock_use_ability.call_count, expected_calls)
+        # Should press the hotkey and wait for each ability in basic_combo
+        mock_pyautogui.press.assert_has_calls([call('1'), call('2'), call('3')])
+        mock_sleep.assert_has_calls([call(1.2), call(1.5), call(2.0)])
+    
+    @patch('COH_BOT.player_attacks.pyautogui')
+    @patch('COH_BOT.player_attacks.time.sleep')
+    def test_execute_chain_edited_in_place(self, mock_sleep, mock_pyautogui):
+        """Test that in-place chain edits and hotkey remaps apply after first use."""
+        self.controller.execute_attack_chain('quick_strike')
+        self.controller.attack_chains['quick_strike'].append((9, 0.5))
+        self.controller.attack_chains['quick_strike'][0] = (3, 0.5)
+        self.controller.hotkeys[2] = 'e'
+        mock_pyautogui.reset_mock()
+        
+        self.controller.execute_attack_chain('quick_strike')
+        
+        self.assertEqual(mock_pyautogui.press.call_args_list, [call('3'), call('e'), call('9')])
+    
+    @patch('COH_BOT.player_attacks.pyautogui')
+    def test_execute_chain_with_unknown_ability(self, mock_pyautogui):
+        """Test that a chain with an unknown ability is rejected before any press."""
+        self.controller.attack_chains['quick_strike'].append((42, 0.5))
+        
+        with self.assertRaises(ValueError):
+            self.controller.execute_attack_chain('quick_strike')
+        mock_pyautogui.press.assert_not_called()
+    
+    @patch('COH_BOT.player_attacks.pyautogui')
+    @patch('COH_BOT.player_attacks.time.sleep')
+    def test_execute_attack_chain_low_health(self, mock_sleep, mock_pyautogui):
+        """Test that low health interrupts a chain using the injected monitor."""
+        monitor = MagicMock()
+        monitor.get_health_percentage.return_value = 10
+        controller = AttackController(monitor=monitor)
+        
+        controller.execute_attack_chain('basic_combo', interrupt_on_low_health=True)
+        
+        monitor.get_health_percentage.assert_called_once()
+        mock_pyautogui.press.assert_not_called()
     
     def test_execute_unknown_chain(self):
         """Test executing unknown attack chain."""
@@ -114,6 +150,22 @@ class TestAttackController(unittest.TestCase):
         self.controller.modify_ability_timing(1, 2.0)
         
         self.assertEqual(self.controller.ability_timings[1], 2.0)
+        
+        with patch('COH_BOT.player_attacks.pyautogui'), \
+                patch('COH_BOT.player_attacks.time.sleep') as mock_sleep:
+            self.controller.use_ability(1)
+        mock_sleep.assert_called_with(2.0)
+    
+    @patch('COH_BOT.player_attacks.pyautogui')
+    def test_use_ability_remapped_hotkeys(self, mock_pyautogui):
+        """Test that edits to hotkeys are used by the next press."""
+        self.controller.hotkeys[1] = 'q'
+        self.controller.hotkeys[10] = '0'
+        
+        self.controller.use_ability(1, wait_for_animation=False)
+        self.controller.use_ability(10, wait_for_animation=False)
+        
+        mock_pyautogui.press.assert_has_calls([call('q'), call('0')])
     
     def test_get_available_chains(self):
         """Test getting available chain names."""
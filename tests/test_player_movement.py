@@ -4,7 +4,7 @@ Unit tests for player_movement module.
 """
 
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, call
 import time
 from COH_BOT.player_movement import MovementController
 
@@ -112,6 +112,17 @@ class TestMovementController(unittest.TestCase):
         expected_calls = len(self.controller.keys)
         self.assertEqual(mock_pyautogui.keyUp.call_count, expected_calls)
     
+    @patch('COH_BOT.player_movement.pyautogui')
+    @patch('COH_BOT.player_movement.time.sleep')
+    def test_circle_strafe_target(self, mock_sleep, mock_pyautogui):
+        """Test circle strafing holds movement keys for the whole circle."""
+        self.controller.circle_strafe_target(duration=4.0)
+        
+        # Forward and strafe pressed once each, plus one turn per segment
+        self.assertEqual(mock_pyautogui.keyDown.call_count, 6)
+        self.assertEqual(mock_pyautogui.keyDown.call_args_list[:2], [call('w'), call('d')])
+        mock_pyautogui.keyUp.assert_called_with('w')
+    
     def test_navigate_to_waypoint_close(self):
         """Test navigation when already close to waypoint."""
         # When within 5 units, should return True
@@ -0,0 +1,31 @@
+"""
+Convert a msgpack session log to JSON lines for inspection.
+
+Usage: python tools/dump_msgpack_log.py logs/gameplay_session_<timestamp>.msgpack
+"""
+
+import sys
+import json
+
+import msgpack
+
+
+def dump(path: str, out=sys.stdout):
+    """Write each record in a msgpack session log as one JSON line."""
+    with open(path, 'rb') as f:
+        for entry in msgpack.Unpacker(f, raw=False):
+            out.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+
+def main():
+    """Dump every session log named on the command line."""
+    if len(sys.argv) < 2:
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(1)
+    
+    for path in sys.argv[1:]:
+        dump(path)
+
+
+if __name__ == "__main__":
+    main()
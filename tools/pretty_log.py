@@ -0,0 +1,33 @@
+"""
+Pretty-print a gameplay session log as indented JSON.
+
+Accepts either the compact .json snapshot or the .jsonl event stream.
+
+Usage: python tools/pretty_log.py logs/gameplay_session_<timestamp>.json
+"""
+
+import sys
+import json
+
+
+def load(path: str) -> list:
+    """Read a session snapshot or JSONL stream into a list of entries."""
+    with open(path, encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+
+def main():
+    """Print every session log named on the command line."""
+    if len(sys.argv) < 2:
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(1)
+    
+    for path in sys.argv[1:]:
+        json.dump(load(path), sys.stdout, indent=2, ensure_ascii=False)
+        sys.stdout.write('\n')
+
+
+if __name__ == "__main__":
+    main()